@@ -11,73 +11,44 @@ st.set_page_config(
 )
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
 import re
 import json
+import orjson
+import time
+import hashlib
+import numpy as np
 import pandas as pd
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
+CSS_PATH = Path(__file__).parent / "static" / "theme.css"
+
+@st.cache_resource
+def load_css():
+    # Read the theme stylesheet once per process instead of on every rerun
+    return CSS_PATH.read_text(encoding="utf-8")
+
 # Apply CSS for dark/light mode compatibility
-st.markdown("""
-<style>
-/* Adaptive coloring based on theme */
-.dark-light-text {
-    color: var(--text-color);
-}
-.dark-light-bg {
-    background-color: var(--background-color);
-}
-.dark-light-card {
-    background-color: var(--secondary-background-color);
-    padding: 1rem;
-    border-radius: 0.5rem;
-    margin-bottom: 1rem;
-}
-/* Common styles for both themes */
-.text-center {
-    text-align: center;
-}
-/* Rating styles that work in both modes */
-.rating-legend {
-    display: flex;
-    margin-bottom: 15px;
-}
-.rating-category {
-    padding: 5px 10px;
-    margin-right: 10px;
-    border-radius: 4px;
-    color: var(--text-color);
-}
-.bad {
-    background-color: rgba(203, 52, 56, 0.5);
-    border: 1px solid #CB3438;
-}
-.good {
-    background-color: rgba(217, 143, 5, 0.5);
-    border: 1px solid #D98F05;
-}
-.excellent {
-    background-color: rgba(95, 169, 90, 0.5);
-    border: 1px solid #5FA95A;
-}
-/* Section header style */
-.section-header {
-    background-color: var(--secondary-background-color);
-    border: 1px solid var(--primary-color);
-    padding: 10px;
-    border-radius: 5px;
-    margin-bottom: 10px;
-    font-weight: bold;
-}
-</style>
-"""
-, unsafe_allow_html=True)
+st.markdown(f"<style>\n{load_css()}</style>", unsafe_allow_html=True)
 
+@lru_cache(maxsize=256)
 def extract_site_name(url):
     try:
-        netloc = urlparse(url).netloc
-        name = netloc.replace("www.", "").split(".")[0].capitalize()
-        return name
+        # Plain string splits are enough to pull the host out of a typical URL
+        netloc = url.split("://", 1)[-1].split("/", 1)[0].split("?", 1)[0].split("#", 1)[0]
+        if "@" in netloc:
+            # Credentials in the URL: let urlparse separate them from the host
+            host = urlparse(url).hostname or ""
+        else:
+            host = netloc.split(":", 1)[0]
+        name = host.removeprefix("www.").split(".")[0].capitalize()
+        return name or "Site"
     except:
         return "Site"
 
@@ -85,41 +56,223 @@ st.markdown("## 🔍 Competitor UI Analyzer")
 st.markdown("Analyze and compare websites using **Gemini 1.5 Pro** AI.")
 
 API_KEY = st.secrets["gemini"]["api_key"]
-API_URL = f"https://generativelanguage.googleapis.com/v1/models/gemini-1.5-pro:generateContent?key={API_KEY}"
+GEMINI_MODEL = "gemini-1.5-pro"
+# Server-sent-events endpoint: the reply arrives as a series of partial responses
+# v1beta because the structured-output generationConfig fields are only accepted there
+API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:streamGenerateContent?alt=sse&key={API_KEY}"
+GEMINI_CACHE_TTL = 24 * 60 * 60  # seconds a cached Gemini response stays valid
+GEMINI_CACHE_MAX_ENTRIES = 128  # oldest responses are evicted past this size
+GEMINI_HEADERS = {"Content-Type": "application/json"}
+
+# Keep-alive session for Gemini so repeat calls skip the TCP/TLS handshake.
+# POST is not retried by default, so allow it explicitly for transient gateway errors.
+GEMINI_SESSION = requests.Session()
+GEMINI_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    ),
+))
+
+# Shared HTTP session so page fetches reuse pooled connections
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+FETCH_TIMEOUT = (5, 15)  # (connect, read) seconds
+GEMINI_TIMEOUT = (5, 60)  # (connect, read) seconds; read bounds the gap between streamed events
+MAX_HTML_BYTES = 1024 * 1024  # only the first 1 MB of a page is parsed
+
+# Layout elements counted per page, mapped from tag name to summary bucket
+UI_ELEMENT_BUCKETS = {
+    "nav": "Navbars",
+    "form": "Forms",
+    "button": "Buttons/Links",
+    "a": "Buttons/Links",
+    "input": "Inputs",
+    "h1": "Headers (H1–H6)",
+    "h2": "Headers (H1–H6)",
+    "h3": "Headers (H1–H6)",
+    "h4": "Headers (H1–H6)",
+    "h5": "Headers (H1–H6)",
+    "h6": "Headers (H1–H6)",
+    "section": "Sections",
+}
+# One selector matching every counted element (links only when they have an href)
+UI_ELEMENTS_SELECTOR = ", ".join("a[href]" if tag == "a" else tag for tag in UI_ELEMENT_BUCKETS)
+
+class UncachedSummary(Exception):
+    # Carries the summary of a page served with an error status out of the cached fetch
+    def __init__(self, summary):
+        super().__init__(summary)
+        self.summary = summary
+
+# Cached per URL across reruns; failures and error-status pages raise, so they are never cached
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_ui_summary(url):
+    # Stream the body and stop at MAX_HTML_BYTES so huge pages can't balloon memory or parse time
+    body = bytearray()
+    with SESSION.get(url, timeout=FETCH_TIMEOUT, headers={"User-Agent": "Mozilla/5.0"}, stream=True) as response:
+        for chunk in response.iter_content(65536):
+            body += chunk
+            if len(body) >= MAX_HTML_BYTES:
+                break
+    # Parse the raw bytes to skip requests' charset detection and a full str decode.
+    # Counting tags only needs ASCII-compatible bytes, so a mis-decoded charset (e.g.
+    # windows-1252) doesn't change the counts; UTF-16 pages are not handled and count as 0.
+    tree = LexborHTMLParser(bytes(body[:MAX_HTML_BYTES]))
+    # Single pass over the document, bucketing matches by tag name
+    counts = Counter(UI_ELEMENT_BUCKETS[node.tag] for node in tree.css(UI_ELEMENTS_SELECTOR))
+    summary = {bucket: counts[bucket] for bucket in dict.fromkeys(UI_ELEMENT_BUCKETS.values())}
+    if not response.ok:
+        # Bot walls and transient 5xx pages are still counted, just not cached
+        raise UncachedSummary(summary)
+    return summary
 
 def extract_ui_summary_from_html(url):
     try:
-        response = requests.get(url, timeout=20, headers={"User-Agent": "Mozilla/5.0"})
-        soup = BeautifulSoup(response.text, "html.parser")
-        summary = {
-            "Navbars": len(soup.find_all("nav")),
-            "Forms": len(soup.find_all("form")),
-            "Buttons/Links": len(soup.find_all("button")) + len(soup.find_all("a", href=True)),
-            "Inputs": len(soup.find_all("input")),
-            "Headers (H1–H6)": len(soup.find_all(re.compile("^h[1-6]$"))),
-            "Sections": len(soup.find_all("section")),
-        }
-        return summary
+        return fetch_ui_summary(url)
+    except UncachedSummary as e:
+        return e.summary
     except Exception as e:
         return {"error": str(e)}
 
-def call_gemini(prompt):
-    headers = {"Content-Type": "application/json"}
+@st.cache_resource
+def gemini_cache():
+    # Process-wide store of successful Gemini responses: key -> (expires_at, text)
+    return {}
+
+def store_gemini_response(cache, key, text):
+    now = time.time()
+    # Drop expired entries, then the oldest ones, so the store stays bounded
+    for expired_key in [k for k, (expires_at, _) in list(cache.items()) if expires_at <= now]:
+        cache.pop(expired_key, None)
+    while len(cache) >= GEMINI_CACHE_MAX_ENTRIES:
+        cache.pop(next(iter(cache)), None)
+    cache[key] = (now + GEMINI_CACHE_TTL, text)
+
+def gemini_cache_key(data):
+    canonical = orjson.dumps({"model": GEMINI_MODEL, "request": data}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(canonical).hexdigest()
+
+class GeminiError(Exception):
+    """Raised when the Gemini API answers with a non-200 status."""
+
+def call_gemini(prompt, response_schema=None, on_progress=None):
     data = {"contents": [{"parts": [{"text": prompt}]}]}
-    response = requests.post(API_URL, headers=headers, data=json.dumps(data))
-    if response.status_code == 200:
-        result = response.json()
-        return result["candidates"][0]["content"]["parts"][0]["text"]
-    else:
-        # Check for rate limit errors (status code 429)
-        if response.status_code == 429:
-            error_text = "⚠️ API rate limit reached. Please try again later."
-            st.error(error_text)
-            return error_text
-        else:
-            return f"❌ Error from Gemini: {response.status_code} - {response.text}"
+    if response_schema:
+        # Force a bare JSON body matching the schema instead of free-form prose
+        data["generationConfig"] = {"responseMimeType": "application/json", "responseSchema": response_schema}
+
+    # Re-analyzing the same sites sends the same prompt, so serve it from the cache
+    cache = gemini_cache()
+    key = gemini_cache_key(data)
+    cached = cache.get(key)
+    if cached:
+        if cached[0] > time.time():
+            return cached[1]
+        cache.pop(key, None)
+
+    try:
+        with GEMINI_SESSION.post(API_URL, headers=GEMINI_HEADERS, data=orjson.dumps(data), stream=True, timeout=GEMINI_TIMEOUT) as response:
+            if response.status_code == 200:
+                text = ""
+                finish_reason = None
+                for line in response.iter_lines():
+                    # Each "data:" event carries the next piece of the generated text
+                    if not line.startswith(b"data:"):
+                        continue
+                    candidates = orjson.loads(line[5:]).get("candidates")
+                    if not candidates:
+                        continue
+                    parts = candidates[0].get("content", {}).get("parts", [])
+                    text += "".join(part.get("text", "") for part in parts)
+                    finish_reason = candidates[0].get("finishReason", finish_reason)
+                    if on_progress:
+                        on_progress(text)
+                # Only complete replies are cached; MAX_TOKENS/SAFETY/RECITATION cut-offs can be retried
+                if text and finish_reason == "STOP":
+                    store_gemini_response(cache, key, text)
+                return text
+            else:
+                # Check for rate limit errors (status code 429)
+                if response.status_code == 429:
+                    raise GeminiError("⚠️ API rate limit reached. Please try again later.")
+                else:
+                    raise GeminiError(f"❌ Error from Gemini: {response.status_code} - {response.text}")
+    except requests.RequestException as e:
+        # Timeouts and dropped streams surface like API errors instead of hanging the spinner
+        raise GeminiError(f"❌ Error from Gemini: {e}") from e
+
+# Greedy match for the JSON object embedded in a response (fallback only)
+JSON_BLOCK_RE = re.compile(r'\{[\s\S]+\}')
+JSON_DECODER = json.JSONDecoder()
+
+def parse_json_block(text):
+    # Structured-output responses are bare JSON; otherwise decode the first embedded object
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    start = text.find("{")
+    if start == -1:
+        return None
+    try:
+        return JSON_DECODER.raw_decode(text, start)[0]
+    except json.JSONDecodeError:
+        match = JSON_BLOCK_RE.search(text)
+        return json.loads(match.group()) if match else None
+
+SCORE_CATEGORIES = (
+    "Visual Design",
+    "Navigation Clarity",
+    "Content Hierarchy",
+    "Call-To-Action Visibility",
+    "Accessibility",
+    "Overall UX",
+)
 
-def compare_with_gemini(name1, name2, desc1, desc2):
+def analysis_schema():
+    # Scores are keyed by slot rather than site name so identical names can't collide;
+    # propertyOrdering keeps Gemini from reordering fields alphabetically
+    site_scores = {
+        "type": "OBJECT",
+        "properties": {category: {"type": "INTEGER"} for category in SCORE_CATEGORIES},
+        "required": list(SCORE_CATEGORIES),
+        "propertyOrdering": list(SCORE_CATEGORIES),
+    }
+    return {
+        "type": "OBJECT",
+        "properties": {
+            "comparison": {
+                "type": "OBJECT",
+                "properties": {
+                    "similarities": {"type": "STRING"},
+                    "differences": {"type": "STRING"},
+                    "suggestions": {"type": "STRING"},
+                },
+                "required": ["similarities", "differences", "suggestions"],
+                "propertyOrdering": ["similarities", "differences", "suggestions"],
+            },
+            "scores": {
+                "type": "OBJECT",
+                "properties": {"site_a": site_scores, "site_b": site_scores},
+                "required": ["site_a", "site_b"],
+                "propertyOrdering": ["site_a", "site_b"],
+            },
+        },
+        "required": ["comparison", "scores"],
+        "propertyOrdering": ["comparison", "scores"],
+    }
+
+def analyze_with_gemini(name1, name2, desc1, desc2, on_progress=None):
+    # One request returns both the comparison and the scorecard
+    categories = "\n".join(f"- {category}" for category in SCORE_CATEGORIES)
     prompt = f"""
 Compare these two website UIs and their design approaches in detail:
 
@@ -127,65 +280,149 @@ Compare these two website UIs and their design approaches in detail:
 
 {name2}: {desc2}
 
-Provide a comprehensive analysis with the following sections:
-1. KEY SIMILARITIES: Identify all shared UI patterns, design elements, and approaches.
-2. KEY DIFFERENCES: Compare layout structure, visual hierarchy, navigation approaches, and content presentation styles.
-3. UX IMPROVEMENT SUGGESTIONS: Provide specific recommendations for each site to enhance usability, focusing on:
+Return a JSON object with two fields.
+
+"comparison" holds a comprehensive analysis with the following sections, one point per line:
+- "similarities": KEY SIMILARITIES. Identify all shared UI patterns, design elements, and approaches.
+- "differences": KEY DIFFERENCES. Compare layout structure, visual hierarchy, navigation approaches, and content presentation styles.
+- "suggestions": UX IMPROVEMENT SUGGESTIONS. Provide specific recommendations for each site to enhance usability, focusing on:
    - Navigation improvements
    - Visual design enhancements
    - Content organization
    - Accessibility considerations
    - Interactive elements
+  Start each suggestion with the name of the site it applies to, followed by a colon.
 
 For each category, include specific examples from each website to illustrate your points.
+
+"scores" assigns a score from 1 to 10 (10 being best) for each of these UX categories, under "site_a" for {name1} and "site_b" for {name2}:
+{categories}
 """
-    return call_gemini(prompt)
+    response = call_gemini(prompt, response_schema=analysis_schema(), on_progress=on_progress)
+    # If the response isn't usable JSON, fall back to reading the sections out of free-form text
+    try:
+        result = parse_json_block(response)
+    except Exception as e:
+        return split_comparison_sections(response), {"error": f"❌ Could not parse scores: {str(e)}"}, response
+    if not isinstance(result, dict):
+        return split_comparison_sections(response), {"error": "❌ JSON block not found."}, response
 
-def score_with_gemini(name1, name2, desc1, desc2):
-    prompt = f"""
-Based on the following UI summaries, assign a score from 1 to 10 (10 being best) for each of these UX categories:
-- Visual Design
-- Navigation Clarity
-- Content Hierarchy
-- Call-To-Action Visibility
-- Accessibility
-- Overall UX
+    comparison = result.get("comparison") or {}
+    sections = {
+        "Similarities": comparison.get("similarities", ""),
+        "Differences": comparison.get("differences", ""),
+        "Suggestions": comparison.get("suggestions", ""),
+    }
+    site_scores = result.get("scores") or {}
+    if site_scores.get("site_a") and site_scores.get("site_b"):
+        scores = {name1: site_scores["site_a"], name2: site_scores["site_b"]}
+    else:
+        scores = {"error": "❌ Scores missing from Gemini response."}
+    return sections, scores, response
 
-{name1}: {desc1}
+# Header keywords in the comparison response, checked in order, and the section they start
+SECTION_HEADER_KEYWORDS = (
+    ("similarities", "Similarities"),
+    ("differences", "Differences"),
+    ("suggestions", "Suggestions"),
+    ("recommendations", "Suggestions"),
+)
 
-{name2}: {desc2}
+# Opening of a comparison string in the streamed JSON, up to wherever the stream has reached
+PARTIAL_SECTION_RE = re.compile(r'"(similarities|differences|suggestions)"\s*:\s*"((?:[^"\\]|\\.)*)')
+PARTIAL_ESCAPE_RE = re.compile(r'\\u[0-9a-fA-F]{0,3}$')
+PREVIEW_TITLES = {
+    "similarities": "🔹 KEY SIMILARITIES",
+    "differences": "🔸 KEY DIFFERENCES",
+    "suggestions": "💡 UX IMPROVEMENT SUGGESTIONS",
+}
 
-Format the output as JSON:
-{{
-  "{name1}": {{"Visual Design": X, ...}},
-  "{name2}": {{"Visual Design": Y, ...}}
-}}
-"""
-    response = call_gemini(prompt)
-    try:
-        match = re.search(r'\{[\s\S]+\}', response)
-        if match:
-            return json.loads(match.group()), response
-        else:
-            return {"error": "❌ JSON block not found."}, response
-    except Exception as e:
-        return {"error": f"❌ Could not parse scores: {str(e)}"}, response
+def comparison_preview(partial_json):
+    # Markdown of the comparison text received so far, decoded out of the partial JSON reply
+    blocks = []
+    for key, raw in PARTIAL_SECTION_RE.findall(partial_json):
+        try:
+            value = json.loads('"' + PARTIAL_ESCAPE_RE.sub("", raw) + '"')
+        except json.JSONDecodeError:
+            continue
+        blocks.append(f"**{PREVIEW_TITLES[key]}**\n\n" + value.replace("\n", "  \n"))
+    return "\n\n".join(blocks)
 
 def split_comparison_sections(response_text):
     sections = {"Similarities": "", "Differences": "", "Suggestions": ""}
     current = None
     for line in response_text.split("\n"):
-        lower = line.strip().lower()
-        if "similarities" in lower:
-            current = "Similarities"
-        elif "differences" in lower:
-            current = "Differences"
-        elif "suggestions" in lower or "recommendations" in lower:
-            current = "Suggestions"
-        elif current:
-            sections[current] += line.strip() + "\n"
+        stripped = line.strip()
+        lower = stripped.lower()
+        for keyword, section in SECTION_HEADER_KEYWORDS:
+            if keyword in lower:
+                current = section
+                break
+        else:
+            if current:
+                sections[current] += stripped + "\n"
     return sections
 
+def escape_styler(styler):
+    # Site names and Gemini score keys end up in raw HTML, so escape cells and both headers
+    return (
+        styler.format(escape="html")
+        .format_index(escape="html", axis=0)
+        .format_index(escape="html", axis=1)
+    )
+
+# Styled tables are cached as HTML so reruns (tab clicks, expanders) skip pandas styling
+@st.cache_data(show_spinner=False)
+def build_layout_df(s1, s2, name1, name2):
+    # Align both summaries on element name (missing elements count as 0)
+    site1_counts, site2_counts = pd.Series(s1).align(pd.Series(s2), fill_value=0)
+    df = (
+        pd.concat(
+            [site1_counts, site2_counts, site2_counts - site1_counts],
+            axis=1,
+            keys=[f"🅰️ {name1}", f"🅱️ {name2}", "Difference"],
+        )
+        .sort_index()
+        .astype(int)
+        .rename_axis("Element")
+        .reset_index()
+    )
+    
+    # Highlight differences column-wise - using specified color codes
+    def highlight_diff(col):
+        return np.where(
+            col > 0,
+            'background-color: rgba(95, 169, 90, 0.5); border: 1px solid #5FA95A;',  # Green for positive
+            np.where(col < 0, 'background-color: rgba(203, 52, 56, 0.5); border: 1px solid #CB3438;', ''),  # Red for negative
+        )
+    
+    # Apply styling
+    styled_df = df.style.apply(highlight_diff, subset=['Difference']).hide(axis="index")
+    return escape_styler(styled_df).to_html()
+
+@st.cache_data(show_spinner=False)
+def build_score_df(score_data, name1, name2):
+    # Fixed row/column order regardless of the key order in Gemini's reply
+    df = pd.DataFrame(score_data).T.reindex(index=[name1, name2], columns=list(SCORE_CATEGORIES))
+    
+    # Function to color cells based on value - using specified color codes
+    def color_rating(val):
+        if pd.isna(val):
+            return ''  # Category missing from the reply
+        elif val <= 4:
+            return 'background-color: rgba(203, 52, 56, 0.5); border: 1px solid #CB3438;'  # Red for bad
+        elif val <= 7:
+            return 'background-color: rgba(217, 143, 5, 0.5); border: 1px solid #D98F05;'  # Orange for good
+        else:
+            return 'background-color: rgba(95, 169, 90, 0.5); border: 1px solid #5FA95A;'  # Green for excellent
+    
+    # Apply styling (using .map instead of deprecated .applymap)
+    styled_df = df.style.map(color_rating)
+    # Still highlight max values with a border
+    styled_df = styled_df.highlight_max(axis=0, props='border: 2px solid black')
+    
+    return escape_styler(styled_df).to_html()
+
 tab1, tab4, tab2, tab3 = st.tabs(["🔗 Input URLs", "📈 UX Scorecard", "📊 Layout Summary", "🤖 Gemini Comparison"])
 
 with tab1:
@@ -207,9 +444,13 @@ with tab1:
         else:
             try:
                 name1, name2 = extract_site_name(url1), extract_site_name(url2)
+                if name1 == name2:
+                    # Same domain (or both unparseable): keep the two sites apart in every table
+                    name1, name2 = f"{name1} (A)", f"{name2} (B)"
                 with st.spinner("Fetching layout summaries..."):
-                    s1 = extract_ui_summary_from_html(url1)
-                    s2 = extract_ui_summary_from_html(url2)
+                    # Fetch both sites in parallel; the wait is bounded by the slower one
+                    with ThreadPoolExecutor(max_workers=2) as executor:
+                        s1, s2 = executor.map(extract_ui_summary_from_html, [url1, url2])
                 
                 # Check if there was an error with either URL
                 if "error" in s1:
@@ -222,14 +463,19 @@ with tab1:
                     continue_analysis = True
                     
                 if continue_analysis:
-                    with st.spinner("Getting Gemini Comparison..."):
-                        comparison = compare_with_gemini(name1, name2, s1, s2)
-                    with st.spinner("Scoring UX..."):
-                        scores, raw = score_with_gemini(name1, name2, s1, s2)
-                    
-                    # Check if a rate limit error was returned
-                    if "API rate limit reached" in comparison or "API rate limit reached" in raw:
-                        st.error("⚠️ API request failed. Please try again.")
+                    try:
+                        with st.spinner("Getting Gemini Comparison and UX Scores..."):
+                            # Show the response as it streams in, then clear it once parsed
+                            live_output = st.empty()
+                            comparison, scores, raw = analyze_with_gemini(
+                                name1, name2, s1, s2,
+                                on_progress=lambda text: live_output.markdown(comparison_preview(text)),
+                            )
+                            live_output.empty()
+                    except GeminiError as e:
+                        # Rate limits and API errors leave the previous analysis in place
+                        live_output.empty()
+                        st.error(str(e))
                     else:
                         st.session_state.update({
                             "s1": s1,
@@ -238,7 +484,7 @@ with tab1:
                             "name2": name2,
                             "comparison": comparison,
                             "scores": scores,
-                            "raw_score_response": raw
+                            "raw_response": raw
                         })
                         st.success("✅ Analysis complete. View all tabs.")
             except Exception as e:
@@ -261,27 +507,14 @@ with tab4:
         if "error" in score_data:
             st.error(score_data["error"])
             with st.expander("🔍 Raw Gemini Response"):
-                st.code(st.session_state["raw_score_response"])
+                st.code(st.session_state["raw_response"])
         else:
-            df = pd.DataFrame(score_data).T
-            
-            # Function to color cells based on value - using specified color codes
-            def color_rating(val):
-                if val <= 4:
-                    return 'background-color: rgba(203, 52, 56, 0.5); border: 1px solid #CB3438;'  # Red for bad
-                elif val <= 7:
-                    return 'background-color: rgba(217, 143, 5, 0.5); border: 1px solid #D98F05;'  # Orange for good
-                else:
-                    return 'background-color: rgba(95, 169, 90, 0.5); border: 1px solid #5FA95A;'  # Green for excellent
-            
-            # Apply styling (using .map instead of deprecated .applymap)
-            styled_df = df.style.map(color_rating)
-            # Still highlight max values with a border
-            styled_df = styled_df.highlight_max(axis=0, props='border: 2px solid black')
-            
-            st.dataframe(styled_df)
+            st.markdown(
+                build_score_df(score_data, st.session_state["name1"], st.session_state["name2"]),
+                unsafe_allow_html=True,
+            )
             with st.expander("🔍 Raw Gemini Response"):
-                st.code(st.session_state["raw_score_response"])
+                st.code(st.session_state["raw_response"])
     else:
         st.info("Run the analysis to view UX scoring.")
     
@@ -310,37 +543,8 @@ with tab2:
         name1 = st.session_state['name1']
         name2 = st.session_state['name2']
         
-        # Create a list of all possible layout elements
-        all_elements = sorted(set(list(s1.keys()) + list(s2.keys())))
-        
-        # Create data for the comparison table
-        comparison_data = []
-        for element in all_elements:
-            site1_value = s1.get(element, 0)
-            site2_value = s2.get(element, 0)
-            comparison_data.append({
-                "Element": element,
-                f"🅰️ {name1}": site1_value,
-                f"🅱️ {name2}": site2_value,
-                "Difference": site2_value - site1_value
-            })
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(comparison_data)
-        
-        # Function to highlight differences - using specified color codes
-        def highlight_diff(val):
-            if isinstance(val, int) and val > 0:
-                return 'background-color: rgba(95, 169, 90, 0.5); border: 1px solid #5FA95A;'  # Green for positive
-            elif isinstance(val, int) and val < 0:
-                return 'background-color: rgba(203, 52, 56, 0.5); border: 1px solid #CB3438;'  # Red for negative
-            return ''
-        
-        # Apply styling
-        styled_df = df.style.map(highlight_diff, subset=['Difference'])
-        
         # Display the comparison table
-        st.dataframe(styled_df)
+        st.markdown(build_layout_df(s1, s2, name1, name2), unsafe_allow_html=True)
         
         # Show raw JSON data in expandable sections
         with st.expander(f"🔍 View Raw JSON Data"):
@@ -372,7 +576,7 @@ with tab2:
 with tab3:
     st.markdown("### 🤖 Gemini-Powered Comparison")
     if "comparison" in st.session_state:
-        structured = split_comparison_sections(st.session_state["comparison"])
+        structured = st.session_state["comparison"]
         
         # Create tabs for similarities, differences and suggestions
         comparison_tabs = st.tabs(["🔹 KEY SIMILARITIES", "🔸 KEY DIFFERENCES", "💡 UX IMPROVEMENT SUGGESTIONS"])
@@ -413,32 +617,36 @@ with tab3:
                     name2 = st.session_state.get('name2', 'Site B')
                     site_tabs = st.tabs([f"🅰️ {name1}", f"🅱️ {name2}", "🔄 General"])
                     
+                    # Bucket the suggestion lines in one pass; a line naming both sites goes to both
+                    name1_lower, name2_lower = name1.lower(), name2.lower()
+                    site_a_lines, site_b_lines, general_lines = [], [], []
+                    for line in structured["Suggestions"].splitlines():
+                        lower = line.lower()
+                        for_site_a = name1_lower in lower or "site a" in lower or "first site" in lower
+                        for_site_b = name2_lower in lower or "site b" in lower or "second site" in lower
+                        if for_site_a:
+                            site_a_lines.append(line)
+                        if for_site_b:
+                            site_b_lines.append(line)
+                        if not (for_site_a or for_site_b) and line.strip():
+                            general_lines.append(line)
+                    
                     with site_tabs[0]:
-                        found = False
-                        for line in structured["Suggestions"].split("\n"):
-                            if name1 in line or "Site A" in line or "site a" in line or "First site" in line.lower():
-                                found = True
-                                st.markdown(line)
-                        if not found:
+                        for line in site_a_lines:
+                            st.markdown(line)
+                        if not site_a_lines:
                             st.markdown("_No specific suggestions for this site._")
                     
                     with site_tabs[1]:
-                        found = False
-                        for line in structured["Suggestions"].split("\n"):
-                            if name2 in line or "Site B" in line or "site b" in line or "Second site" in line.lower():
-                                found = True
-                                st.markdown(line)
-                        if not found:
+                        for line in site_b_lines:
+                            st.markdown(line)
+                        if not site_b_lines:
                             st.markdown("_No specific suggestions for this site._")
                     
                     with site_tabs[2]:
-                        found = False
-                        for line in structured["Suggestions"].split("\n"):
-                            if not (name1 in line or name2 in line or "Site A" in line or "Site B" in line or "site a" in line or "site b" in line):
-                                if line.strip():
-                                    found = True
-                                    st.markdown(line)
-                        if not found:
+                        for line in general_lines:
+                            st.markdown(line)
+                        if not general_lines:
                             st.markdown("_No general suggestions provided._")
                 else:
                     # Process and display each bullet point
@@ -453,6 +661,6 @@ with tab3:
         
         # Show the raw response in an expander
         with st.expander("🔍 View Raw Gemini Response"):
-            st.code(st.session_state["comparison"])
+            st.code(st.session_state["raw_response"])
     else:
         st.info("Run the analysis first to view comparison.")